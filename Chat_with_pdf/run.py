@@ -12,12 +12,18 @@ The app works by:
 """
 
 # Import required libraries
+import hashlib  # Content hash used to cache the index per uploaded PDF
+import os  # Filesystem paths for the saved indexes
+
+import faiss  # Approximate nearest-neighbour search (HNSW graph index)
+
 import streamlit as st  # Web framework for creating the user interface
 
 # LangChain imports for document processing and RAG pipeline
 from langchain_community.document_loaders import PDFPlumberLoader  # PDF document loader
 from langchain_text_splitters import RecursiveCharacterTextSplitter  # Text chunking
-from langchain_core.vectorstores import InMemoryVectorStore  # Vector database for embeddings
+from langchain_community.vectorstores import FAISS  # Vector database for embeddings
+from langchain_community.docstore.in_memory import InMemoryDocstore  # Holds the chunk texts for FAISS
 from langchain_ollama import OllamaEmbeddings  # Ollama embeddings for semantic search
 from langchain_core.prompts import ChatPromptTemplate  # Prompt template management
 from langchain_ollama.llms import OllamaLLM  # Ollama language model interface
@@ -35,17 +41,37 @@ Answer:
 # Note: You may need to change this path to match your local setup
 pdfs_directory = '/storage/home/hcoda1/3/adeza3/p-phentenryck3-1/adeza3/MultiAgentSBC4/Chat_with_pdf/pdfs/'
 
-# Initialize the embedding model for converting text to vectors
-# phi4:latest is a powerful model that creates high-quality embeddings for semantic search
-embeddings = OllamaEmbeddings(model="phi4:latest")
+# Directory where the FAISS index of each PDF is saved, one sub-folder per PDF hash
+indexes_directory = pdfs_directory + 'indexes/'
+
+# HNSW graph parameters: neighbours per node, and how many candidates are
+# explored per search (higher = better recall, slower queries)
+HNSW_NEIGHBORS = 32
+HNSW_EF_SEARCH = 32
+
+# Number of chunks sent to Ollama per embedding request
+EMBED_BATCH_SIZE = 64
 
-# Create an in-memory vector store to hold document embeddings
-# This allows for fast similarity search when retrieving relevant document chunks
-vector_store = InMemoryVectorStore(embeddings)
+@st.cache_resource
+def get_models():
+    """
+    Create the embedding model and the language model once per server process.
+
+    Streamlit re-runs this whole script on every interaction, so anything
+    expensive to build is cached with @st.cache_resource.
 
-# Initialize the language model for generating answers
-# phi4:latest is used both for embeddings and text generation for consistency
-model = OllamaLLM(model="phi4:latest")
+    Returns:
+        tuple: (OllamaEmbeddings, OllamaLLM)
+    """
+    # phi4:latest is used both for embeddings and text generation for consistency
+    return OllamaEmbeddings(model="phi4:latest"), OllamaLLM(model="phi4:latest")
+
+# Initialize the embedding model (text -> vectors) and the language model
+embeddings, model = get_models()
+
+# Build the question-answering chain once: prompt template -> language model
+# The template is constant, so there is no need to re-parse it for every question
+qa_chain = ChatPromptTemplate.from_template(template) | model
 
 def upload_pdf(file):
     """
@@ -95,19 +121,76 @@ def split_text(documents):
 
 def index_docs(documents):
     """
-    Add document chunks to the vector store for semantic search.
+    Build a vector store holding the document chunks for semantic search.
     
     This process:
     1. Converts each document chunk to a vector embedding
     2. Stores the embedding along with the original text
     3. Enables fast similarity search for question answering
     
+    The chunks go into a FAISS HNSW index, so a search walks a graph in
+    roughly O(log N) instead of comparing the query against every chunk.
+    Vectors are L2-normalised, which makes the L2 ranking identical to a
+    cosine-similarity ranking. Chunks are embedded in batches of
+    EMBED_BATCH_SIZE, so a long PDF costs a handful of requests to Ollama
+    rather than one per chunk.
+    
     Args:
         documents (list): List of Document chunks to be indexed
+        
+    Returns:
+        FAISS: Vector store containing the indexed chunks
     """
-    vector_store.add_documents(documents)
+    texts = [doc.page_content for doc in documents]
+    vectors = []
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        vectors.extend(embeddings.embed_documents(texts[start:start + EMBED_BATCH_SIZE]))
 
-def retrieve_docs(query):
+    # The embedding size is only known from the model's output
+    dimension = len(vectors[0]) if vectors else len(embeddings.embed_query("dimension probe"))
+    index = faiss.IndexHNSWFlat(dimension, HNSW_NEIGHBORS)
+    index.hnsw.efSearch = HNSW_EF_SEARCH
+    vector_store = FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
+        normalize_L2=True
+    )
+    vector_store.add_embeddings(
+        list(zip(texts, vectors)),
+        metadatas=[doc.metadata for doc in documents]
+    )
+    return vector_store
+
+@st.cache_resource(show_spinner="Indexing PDF...")
+def build_index(file_name, file_hash):
+    """
+    Load, split and embed a saved PDF, once per unique file content.
+    
+    Embedding every chunk is by far the slowest step, so the resulting vector
+    store is cached and reused for every question about the same PDF. It is
+    also saved to disk, so the same PDF is not re-embedded in a later session.
+    
+    Args:
+        file_name (str): Name of the PDF inside pdfs_directory
+        file_hash (str): SHA-256 of the PDF bytes; only used as the cache key
+        
+    Returns:
+        FAISS: Vector store for the PDF's chunks
+    """
+    index_path = os.path.join(indexes_directory, file_hash)
+    if os.path.isdir(index_path):
+        # The index was written by this app, so loading its pickled docstore is safe
+        return FAISS.load_local(index_path, embeddings, normalize_L2=True,
+                                allow_dangerous_deserialization=True)
+
+    documents = load_pdf(pdfs_directory + file_name)
+    vector_store = index_docs(split_text(documents))
+    vector_store.save_local(index_path)
+    return vector_store
+
+def retrieve_docs(vector_store, query):
     """
     Find the most relevant document chunks for a given query.
     
@@ -115,6 +198,7 @@ def retrieve_docs(query):
     to contain information relevant to the user's question.
     
     Args:
+        vector_store (FAISS): Index built by build_index
         query (str): User's question or search query
         
     Returns:
@@ -128,7 +212,7 @@ def answer_question(question, documents):
     
     This function implements the "Generation" part of RAG:
     1. Combines retrieved document chunks into context
-    2. Uses the prompt template to structure the input
+    2. Fills the prompt template of the prebuilt qa_chain
     3. Invokes the language model to generate a response
     
     Args:
@@ -139,16 +223,10 @@ def answer_question(question, documents):
         str: Generated answer based on the provided context
     """
     # Combine all retrieved document chunks into a single context string
-    context = "\n\n".join([doc.page_content for doc in documents])
-    
-    # Create a prompt using the template
-    prompt = ChatPromptTemplate.from_template(template)
-    
-    # Create a processing chain: prompt -> model
-    chain = prompt | model
+    context = "\n\n".join(doc.page_content for doc in documents)
     
     # Generate and return the answer
-    return chain.invoke({"question": question, "context": context})
+    return qa_chain.invoke({"question": question, "context": context})
 
 # === STREAMLIT USER INTERFACE ===
 
@@ -165,15 +243,11 @@ if uploaded_file:
     # Step 1: Save the uploaded file to the server
     upload_pdf(uploaded_file)
     
-    # Step 2: Load and extract text from the PDF
-    documents = load_pdf(pdfs_directory + uploaded_file.name)
-    
-    # Step 3: Split the document into smaller chunks for better retrieval
-    chunked_documents = split_text(documents)
-    
-    # Step 4: Create embeddings and store them in the vector database
-    # This enables semantic search for relevant content
-    index_docs(chunked_documents)
+    # Steps 2-4: Load the PDF, split it into chunks and embed them
+    # The result is cached per file content, so this only runs once per PDF
+    # instead of on every question
+    file_hash = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+    vector_store = build_index(uploaded_file.name, file_hash)
     
     # Create a chat input widget for user questions
     question = st.chat_input()
@@ -185,7 +259,7 @@ if uploaded_file:
         
         # Step 5: Retrieve relevant document chunks based on the question
         # Uses semantic similarity to find the most relevant content
-        related_documents = retrieve_docs(question)
+        related_documents = retrieve_docs(vector_store, question)
         
         # Step 6: Generate an answer using the retrieved context
         # Combines retrieval with generation (RAG approach)
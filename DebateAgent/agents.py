@@ -2,14 +2,87 @@
 Agent classes for multi-agent debate system.
 """
 
+import asyncio
 import re
+import time
 from typing import List, Dict, Any, Tuple
-from ollama_utils import ollama_query
+from ollama_utils import ollama_query, async_ollama_query
 from config import (
     DEFAULT_NUM_CTX, DEFAULT_TOP_K, DEFAULT_TOP_P, 
-    DEFAULT_MIN_P, DEFAULT_REPEAT_PENALTY
+    DEFAULT_MIN_P, DEFAULT_REPEAT_PENALTY, DEFAULT_KEEP_ALIVE,
+    MAX_QUERY_ATTEMPTS, RETRY_BACKOFF_SECONDS
 )
-from prompts import JUDGE_SYSTEM_PROMPT
+from prompts import JUDGE_SYSTEM_PROMPT, JUDGE_TRANSCRIPT_PROMPT
+
+# Patterns used to parse the judge's verdict, compiled once at import. A
+# well-formed verdict is parsed in a single scan with VERDICT_PATTERN; the
+# separate patterns are the fallback for responses that only half follow it.
+VERDICT_PATTERN = re.compile(r"Winner:\s*Agent\s*(\w+).*?Justification:\s*(.*)", re.DOTALL | re.IGNORECASE)
+WINNER_PATTERN = re.compile(r"Winner: Agent (\w+)", re.IGNORECASE)
+JUSTIFICATION_PATTERN = re.compile(r"Justification: (.*)", re.DOTALL | re.IGNORECASE)
+
+
+def _query_kwargs(model: str, prompt: str, temp: float, seed: int, system_prompt: str = None) -> Dict[str, Any]:
+    """Build the ollama_query arguments shared by every agent."""
+    return {
+        "ollama_model": model,
+        "prompt_to_LLM": prompt,
+        "system_prompt": system_prompt,
+        "temperature": temp,
+        "seed": seed,
+        "num_ctx": DEFAULT_NUM_CTX,
+        "top_k": DEFAULT_TOP_K,
+        "top_p": DEFAULT_TOP_P,
+        "min_p": DEFAULT_MIN_P,
+        "repeat_penalty": DEFAULT_REPEAT_PENALTY,
+        "keep_alive": DEFAULT_KEEP_ALIVE,
+    }
+
+
+def query_with_retry(label: str, model: str, prompt: str, temp: float, seed: int,
+                     system_prompt: str = None) -> str:
+    """
+    Query the LLM, retrying with exponential backoff on failure.
+    
+    Each retry uses the next seed so it is not an identical request.
+    
+    Args:
+        label: Name of the caller, used in error messages
+        model: Ollama model name to use
+        prompt: Prompt to send
+        temp: Temperature for generation
+        seed: Seed for the first attempt
+        system_prompt: Optional instructions sent as a separate system message
+        
+    Returns:
+        LLM response text
+        
+    Raises:
+        Exception: The last error, once all MAX_QUERY_ATTEMPTS attempts failed
+    """
+    for attempt in range(MAX_QUERY_ATTEMPTS):
+        try:
+            return ollama_query(**_query_kwargs(model, prompt, temp, seed + attempt, system_prompt))
+        except Exception as e:
+            if attempt == MAX_QUERY_ATTEMPTS - 1:
+                raise
+            delay = RETRY_BACKOFF_SECONDS * 2 ** attempt
+            print(f"Error in {label} response: {e}. Retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+
+async def async_query_with_retry(label: str, model: str, prompt: str, temp: float, seed: int,
+                                 system_prompt: str = None) -> str:
+    """Async version of query_with_retry."""
+    for attempt in range(MAX_QUERY_ATTEMPTS):
+        try:
+            return await async_ollama_query(**_query_kwargs(model, prompt, temp, seed + attempt, system_prompt))
+        except Exception as e:
+            if attempt == MAX_QUERY_ATTEMPTS - 1:
+                raise
+            delay = RETRY_BACKOFF_SECONDS * 2 ** attempt
+            print(f"Error in {label} response: {e}. Retrying in {delay:.1f}s...")
+            await asyncio.sleep(delay)
 
 
 class DebateAgent:
@@ -30,47 +103,60 @@ class DebateAgent:
         self.temp = temp
         self.seed = seed
         
-    def respond(self, message: str) -> str:
+    def respond(self, message: str, system_prompt: str = None) -> str:
         """
         Generate response to a message using the LLM.
         
         Args:
             message: Input prompt/message
+            system_prompt: Optional persona/instructions sent as the system message
             
         Returns:
             LLM response text
         """
         try:
-            # First attempt to get a response
-            return ollama_query(
-                ollama_model=self.model,
-                prompt_to_LLM=message,
-                temperature=self.temp,
-                seed=self.seed,
-                num_ctx=DEFAULT_NUM_CTX,
-                top_k=DEFAULT_TOP_K,
-                top_p=DEFAULT_TOP_P,
-                min_p=DEFAULT_MIN_P,
-                repeat_penalty=DEFAULT_REPEAT_PENALTY
-            )
+            return query_with_retry(f"agent {self.agent_id}", self.model, message, self.temp, self.seed, system_prompt)
+        except Exception as e:
+            print(f"Retry failed for agent {self.agent_id}: {e}")
+            return f"Agent {self.agent_id} encountered an error and could not respond."
+
+    async def respond_async(self, message: str, system_prompt: str = None) -> str:
+        """
+        Async version of respond, so several agents can be awaited together.
+
+        Args:
+            message: Input prompt/message
+            system_prompt: Optional persona/instructions sent as the system message
+
+        Returns:
+            LLM response text
+        """
+        try:
+            return await async_query_with_retry(f"agent {self.agent_id}", self.model, message, self.temp, self.seed, system_prompt)
         except Exception as e:
-            print(f"Error in agent {self.agent_id} response: {e}. Retrying once...")
-            try:
-                # Retry once with a different seed
-                return ollama_query(
-                    ollama_model=self.model,
-                    prompt_to_LLM=message,
-                    temperature=self.temp,
-                    seed=self.seed + 1,  # Use a different seed for the retry
-                    num_ctx=DEFAULT_NUM_CTX,
-                    top_k=DEFAULT_TOP_K,
-                    top_p=DEFAULT_TOP_P,
-                    min_p=DEFAULT_MIN_P,
-                    repeat_penalty=DEFAULT_REPEAT_PENALTY
-                )
-            except Exception as e2:
-                print(f"Retry failed for agent {self.agent_id}: {e2}")
-                return f"Agent {self.agent_id} encountered an error and could not respond."
+            print(f"Retry failed for agent {self.agent_id}: {e}")
+            return f"Agent {self.agent_id} encountered an error and could not respond."
+
+
+async def batch_respond(agents: List[DebateAgent], prompts: List[str], system_prompts: List[str]) -> List[str]:
+    """
+    Send one prompt to each agent concurrently.
+    
+    All requests reach Ollama together, so with OLLAMA_NUM_PARALLEL at least
+    len(agents) the server decodes them in one shared batch.
+    
+    Args:
+        agents: Agents to query
+        prompts: User prompt for each agent
+        system_prompts: System prompt for each agent
+        
+    Returns:
+        Responses in the same order as agents
+    """
+    return await asyncio.gather(*(
+        agent.respond_async(prompt, system_prompt)
+        for agent, prompt, system_prompt in zip(agents, prompts, system_prompts)
+    ))
 
 
 class JudgeAgent:
@@ -100,29 +186,27 @@ class JudgeAgent:
             Tuple of (winner_id, justification)
         """
         # Format the transcript for the prompt
-        formatted_transcript = ""
-        for record in transcripts:
-            if "agent" in record and "message" in record:
-                formatted_transcript += f"Round {record.get('round', 'N/A')}, Agent {record['agent']}: {record['message']}\n\n"
+        formatted_transcript = "".join(
+            f"Round {record.get('round', 'N/A')}, Agent {record['agent']}: {record['message']}\n\n"
+            for record in transcripts
+            if "agent" in record and "message" in record
+        )
         
-        prompt = JUDGE_SYSTEM_PROMPT.format(transcript=formatted_transcript)
+        # The instructions are identical for every debate and go in the system
+        # message; only the transcript varies
+        prompt = JUDGE_TRANSCRIPT_PROMPT.format(transcript=formatted_transcript)
         
         try:
-            response = ollama_query(
-                ollama_model=self.model,
-                prompt_to_LLM=prompt,
-                temperature=self.temp,
-                seed=self.seed,
-                num_ctx=DEFAULT_NUM_CTX,
-                top_k=DEFAULT_TOP_K,
-                top_p=DEFAULT_TOP_P,
-                min_p=DEFAULT_MIN_P,
-                repeat_penalty=DEFAULT_REPEAT_PENALTY
-            )
+            response = query_with_retry("judge agent", self.model, prompt, self.temp, self.seed,
+                                        system_prompt=JUDGE_SYSTEM_PROMPT)
             
             # Parse the winner and justification from the response
-            winner_match = re.search(r"Winner: Agent (\w+)", response, re.IGNORECASE)
-            justification_match = re.search(r"Justification: (.*)", response, re.DOTALL | re.IGNORECASE)
+            verdict_match = VERDICT_PATTERN.search(response)
+            if verdict_match:
+                return verdict_match.group(1).strip(), verdict_match.group(2).strip()
+
+            winner_match = WINNER_PATTERN.search(response)
+            justification_match = JUSTIFICATION_PATTERN.search(response)
             
             winner_id = "Unknown"
             justification = "Could not parse justification from response."
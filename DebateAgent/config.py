@@ -1,5 +1,7 @@
 # Configuration file for multi-agent debate system
 
+import os
+
 OLLAMA_NICKNAMES = {
     "gemma3:12b": "gemma3_12b",
     "phi4": "phi4",
@@ -18,4 +20,12 @@ DEFAULT_NUM_CTX = 4096
 DEFAULT_TOP_K = 40
 DEFAULT_TOP_P = 0.9
 DEFAULT_MIN_P = 0.05
-DEFAULT_REPEAT_PENALTY = 1.1 
\ No newline at end of file
+DEFAULT_REPEAT_PENALTY = 1.1
+# How long Ollama keeps a model (and its cached prompt) loaded after a request,
+# e.g. "30m" or "-1". Left unset (None), no keep_alive is sent and the server's
+# own OLLAMA_KEEP_ALIVE setting applies.
+DEFAULT_KEEP_ALIVE = os.environ.get("DEBATE_KEEP_ALIVE")
+# Retry policy for failed Ollama queries: total attempts, and the delay before
+# the first retry (doubled for every further retry)
+MAX_QUERY_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 0.5
@@ -1,5 +1,41 @@
-from ollama import ListResponse, list
-from ollama import chat 
+import asyncio
+import os
+import sys
+import weakref
+
+from ollama import ListResponse
+from ollama import Client
+from ollama import AsyncClient
+
+# response_cache is shared with the other agent projects and lives in the
+# repository's shared/ package
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from shared import response_cache
+from shared.response_cache import cached
+
+
+# One HTTP client shared by every agent, so requests reuse open keep-alive
+# connections to the Ollama server (host is read from OLLAMA_HOST)
+client = Client()
+
+# The async client's connection pool belongs to the event loop it was first
+# used on, and the orchestrator runs each phase in a fresh asyncio.run loop,
+# so keep one AsyncClient per loop (dropped when the loop is garbage collected)
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def set_cache_enabled(enabled: bool) -> None:
+    """Turn the shared response cache on or off for this run (e.g. for --no-cache)."""
+    response_cache.set_enabled(enabled)
+
+
+def get_async_client() -> AsyncClient:
+    """Return the AsyncClient shared by every request on the running event loop."""
+    loop = asyncio.get_running_loop()
+    async_client = _async_clients.get(loop)
+    if async_client is None:
+        async_client = _async_clients[loop] = AsyncClient()
+    return async_client
 
 
 OLLAMA_NICKNAMES= {
@@ -11,11 +47,25 @@ OLLAMA_NICKNAMES= {
 }
 
 
+def build_messages(prompt_to_LLM: str, system_prompt: str = None) -> list:
+    """
+    Build the chat messages for a query.
+
+    A system prompt goes in its own message ahead of the user prompt. Keeping
+    the unchanging part of a prompt there makes every request start with the
+    same tokens, so Ollama can reuse its cached evaluation of that prefix.
+    """
+    messages = [{'role': 'user', 'content': prompt_to_LLM}]
+    if system_prompt:
+        messages.insert(0, {'role': 'system', 'content': system_prompt})
+    return messages
+
+
 def print_ollama_models():
     """
     Print the list of models available in the Ollama server.
     """
-    response: ListResponse = list()
+    response: ListResponse = client.list()
 
     for model in response.models:
         print('Name:', model.model)
@@ -28,6 +78,7 @@ def print_ollama_models():
         print('\n')
 
 
+@cached
 def ollama_query(ollama_model:str,
                  prompt_to_LLM:str,
                  temperature:float,
@@ -37,12 +88,51 @@ def ollama_query(ollama_model:str,
                  top_p: float = 0.9,
                  min_p: float = 0.05,
                  repeat_penalty: float = 1.1,
+                 system_prompt: str = None,
+                 keep_alive: str = None,
                  ):
     """
     See https://github.com/ollama/ollama/blob/main/docs/api.md#generate-request-with-options
     and https://github.com/ollama/ollama/blob/main/docs/modelfile.md for explanations
     """
-    response = chat(
+    response = client.chat(
+            model=ollama_model,
+            options={
+                "temperature":temperature,
+                 "seed":seed,
+                 "num_ctx": num_ctx,
+                 "top_k": top_k,
+                 "top_p": top_p,
+                 "min_p": min_p,
+                 "repeat_penalty": repeat_penalty
+                 },
+            messages=build_messages(prompt_to_LLM, system_prompt),
+            keep_alive=keep_alive,
+        )
+    ret = response['message']['content']
+    return ret
+
+
+@cached
+async def async_ollama_query(ollama_model:str,
+                             prompt_to_LLM:str,
+                             temperature:float,
+                             seed:int = 0,
+                             num_ctx: int = 4096,
+                             top_k: int = 40,
+                             top_p: float = 0.9,
+                             min_p: float = 0.05,
+                             repeat_penalty: float = 1.1,
+                             system_prompt: str = None,
+                             keep_alive: str = None,
+                             ):
+    """
+    Async counterpart of ollama_query.
+
+    Lets several agents have requests in flight at once; the Ollama server
+    only overlaps them when started with OLLAMA_NUM_PARALLEL > 1.
+    """
+    response = await get_async_client().chat(
             model=ollama_model,
             options={
                 "temperature":temperature,
@@ -53,12 +143,8 @@ def ollama_query(ollama_model:str,
                  "min_p": min_p,
                  "repeat_penalty": repeat_penalty
                  },
-            messages=[
-                {
-                    'role': 'user',
-                    'content': prompt_to_LLM
-                }
-            ]
+            messages=build_messages(prompt_to_LLM, system_prompt),
+            keep_alive=keep_alive,
         )
     ret = response['message']['content']
     return ret
@@ -3,38 +3,80 @@ Main orchestrator for the multi-agent debate system.
 This script guides the user through setting up and running a debate between LLM agents.
 """
 
-import json
+import argparse
+import asyncio
 import os
 import platform
 import random
+import re
 import time
 from datetime import datetime
+from collections import defaultdict
+from functools import lru_cache
 from typing import Dict, Any, List
 
-from agents import DebateAgent, JudgeAgent
+from agents import DebateAgent, JudgeAgent, batch_respond
 from config import DEFAULT_MODEL, DEFAULT_TEMP, DEFAULT_SEED
+from ollama_utils import set_cache_enabled
 from prompts import (
-    DEBATE_AGENT_SYSTEM_PROMPT, 
     OPENING_STATEMENT_PROMPT, 
-    DEBATE_RESPONSE_PROMPT
+    build_system_prompt,
+    build_response_prompt
 )
-from topics import get_topic, list_topics, list_topic_keys
+from topics import get_topic, get_topic_keys, list_topics, list_topic_keys
+from utils import json_dumps_bytes, json_dumps_pretty, ns_to_iso
 
 
-def now_iso() -> str:
-    """Return current UTC timestamp in ISO-8601 format."""
-    return datetime.utcnow().isoformat()
+# Characters to drop from a topic before using it in a folder name
+FOLDER_NAME_UNSAFE = re.compile(r"[^\w \-]+")
+
+
+@lru_cache(maxsize=1)
+def system_info() -> Dict[str, str]:
+    """Describe the machine running the debate (computed once per process)."""
+    return {
+        "platform": platform.platform(),
+        "python_version": platform.python_version(),
+    }
 
 
 class JsonLogger:
-    """Simple JSONL logger that appends records with timestamps."""
+    """
+    Simple JSONL logger that appends records with timestamps.
+    
+    Each record's "timestamp" is a UTC ISO-8601 string, taken from a single
+    time.time_ns() read and formatted by utils.ns_to_iso.
+    
+    The file stays open for the whole debate and writes are buffered; call
+    flush() at phase boundaries and close() (or use it as a context manager)
+    when done. Every logged record is also kept in self.records (and agent
+    messages in self.by_round, keyed by round number), so the debate can
+    read back what it has written without re-parsing the file.
+    """
     def __init__(self, path: str) -> None:
         self.path = path
+        self.records: List[Dict[str, Any]] = []
+        self.by_round: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        self._file = open(path, 'ab', buffering=1 << 16)
         
     def log(self, record: Dict[str, Any]) -> None:
-        timestamped_record = {"timestamp": now_iso(), **record}
-        with open(self.path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(timestamped_record) + '\n')
+        timestamped_record = {"timestamp": ns_to_iso(time.time_ns()), **record}
+        self.records.append(timestamped_record)
+        if "round" in record:
+            self.by_round[record["round"]].append(timestamped_record)
+        self._file.write(json_dumps_bytes(timestamped_record) + b'\n')
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "JsonLogger":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
 
 
 def get_user_config() -> Dict[str, Any]:
@@ -46,12 +88,12 @@ def get_user_config() -> Dict[str, Any]:
     
     # 1. Choose topic
     list_topics()
-    topic_keys = list_topic_keys()
+    topic_keys = get_topic_keys()
     while True:
         topic_key = input(f"Choose a topic key from the list: ")
         if topic_key in topic_keys:
             break
-        print(f"Invalid topic key. Please choose from: {', '.join(topic_keys)}")
+        print(f"Invalid topic key. Please choose from: {', '.join(list_topic_keys())}")
     
     # 2. Number of agents
     while True:
@@ -98,17 +140,18 @@ def get_user_config() -> Dict[str, Any]:
     }
 
 
-def create_results_folder(topic: str, num_agents: int, rounds: int, models: List[str]) -> str:
-    """Create a timestamped results folder for this debate run."""
+def create_results_folder(topic: str, num_agents: int, rounds: int, models: List[str],
+                          start_time: datetime = None) -> str:
+    """Create a results folder for this debate run, named after its start time."""
     current_dir = os.path.dirname(os.path.abspath(__file__))
     base_results_dir = os.path.join(current_dir, "results")
     os.makedirs(base_results_dir, exist_ok=True)
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    clean_topic = "".join(c for c in topic if c.isalnum() or c in (' ', '-', '_')).rstrip().replace(' ', '_')[:50]
+    timestamp = (start_time or datetime.now()).strftime("%Y%m%d_%H%M%S")
+    clean_topic = FOLDER_NAME_UNSAFE.sub("", topic).rstrip().replace(' ', '_')[:50]
     
     # Create a model string for the folder name
-    unique_models = sorted(list(set(models)))
+    unique_models = sorted({*models})
     if len(unique_models) == 1:
         model_str = unique_models[0].replace(":", "_") # Clean up model name for folder
     else:
@@ -121,20 +164,31 @@ def create_results_folder(topic: str, num_agents: int, rounds: int, models: List
     return results_folder
 
 
-def load_jsonl(file_path: str) -> List[Dict[str, Any]]:
-    """Load records from a JSONL file."""
-    records = []
-    if os.path.exists(file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                if line.strip():
-                    records.append(json.loads(line))
-    return records
+def respond_all(agents: List[DebateAgent], prompts: List[str], system_prompts: List[str],
+                sequential: bool = False) -> List[str]:
+    """
+    Get one response from each agent, in agent order.
+    
+    Requests are sent concurrently unless sequential is set, in which case
+    each agent waits for the previous one (the order Ollama sees them in is
+    then fixed from run to run).
+    """
+    if sequential:
+        return [agent.respond(prompt, system_prompt)
+                for agent, prompt, system_prompt in zip(agents, prompts, system_prompts)]
+    return asyncio.run(batch_respond(agents, prompts, system_prompts))
 
 
-def run_debate(config: Dict[str, Any]) -> None:
-    """Run a multi-agent debate based on the provided configuration."""
-    start_time = time.time()
+def run_debate(config: Dict[str, Any], sequential: bool = False, quiet: bool = False) -> None:
+    """
+    Run a multi-agent debate based on the provided configuration.
+    
+    With quiet set, the agents' messages are only written to the transcript
+    and not echoed to the console.
+    """
+    # Wall-clock time for the record, a monotonic counter for the duration
+    start_time = datetime.now()
+    start_perf = time.perf_counter()
     
     # Unpack config
     topic_key = config["topic_key"]
@@ -148,80 +202,89 @@ def run_debate(config: Dict[str, Any]) -> None:
     seed = config["seed"]
     
     # Setup results directory and logger
-    results_folder = create_results_folder(topic_key, num_agents, rounds, agent_models)
+    results_folder = create_results_folder(topic_key, num_agents, rounds, agent_models, start_time)
     transcript_path = os.path.join(results_folder, "transcript.jsonl")
     metadata_path = os.path.join(results_folder, "metadata.json")
-    logger = JsonLogger(transcript_path)
-
-    # Log debate metadata
-    logger.log({
-        "event": "debate_start",
-        "config": config,
-        "topic_question": topic_question
-    })
+    with JsonLogger(transcript_path) as logger:
+        # Log debate metadata
+        logger.log({
+            "event": "debate_start",
+            "config": config,
+            "topic_question": topic_question
+        })
+        logger.flush()
     
-    # Initialize agents
-    agents = [DebateAgent(i, agent_models[i], temp, seed + i) for i in range(num_agents)]
-    judge = JudgeAgent(judge_model, temp, seed + 1000)
+        # Initialize agents
+        agents = [DebateAgent(i, agent_models[i], temp, seed + i) for i in range(num_agents)]
+        judge = JudgeAgent(judge_model, temp, seed + 1000)
     
-    agent_model_names = ", ".join(agent_models)
-    print("\n" + "=" * 60)
-    print(f"Starting Debate On: {topic_question}")
-    print(f"Agents: {num_agents} ({agent_model_names}) | Rounds: {rounds} | Judge: {judge_model}")
-    print("=" * 60 + "\n")
-
-    # --- OPENING STATEMENTS ---
-    print("--- OPENING STATEMENTS ---")
-    for i, agent in enumerate(agents):
-        system_prompt = DEBATE_AGENT_SYSTEM_PROMPT.format(topic=topic_question, stance=stances[i])
-        full_prompt = f"{system_prompt}\n\n{OPENING_STATEMENT_PROMPT}"
-        
-        response = agent.respond(full_prompt)
-        logger.log({"round": 0, "agent": i, "stance": stances[i], "model": agent_models[i], "message": response, "type": "opening_statement"})
-        print(f"Agent {i} ({stances[i]}, {agent_models[i]}): {response}\n")
+        # Concurrent requests are only processed in parallel if the server allows it:
+        # start Ollama with OLLAMA_NUM_PARALLEL set to at least the number of agents
+        # so it batches each phase's requests instead of queueing them
+        parallel_slots = os.environ.get("OLLAMA_NUM_PARALLEL")
+        if parallel_slots is not None and parallel_slots.isdigit() and int(parallel_slots) < num_agents:
+            print(f"Warning: OLLAMA_NUM_PARALLEL={parallel_slots} is lower than the {num_agents} agents; "
+                  f"some requests in each round will wait in Ollama's queue.")
+
+        agent_model_names = ", ".join(agent_models)
+        print("\n" + "=" * 60)
+        print(f"Starting Debate On: {topic_question}")
+        print(f"Agents: {num_agents} ({agent_model_names}) | Rounds: {rounds} | Judge: {judge_model}")
+        print("=" * 60 + "\n")
+
+        # --- OPENING STATEMENTS ---
+        print("--- OPENING STATEMENTS ---")
+        # Each agent's persona is fixed for the whole debate and goes in the system
+        # message, so every request from that agent starts with the same tokens
+        system_prompts = [build_system_prompt(topic_question, stance) for stance in stances]
+
+        # Opening statements don't depend on each other, so request them all at once
+        opening_prompts = [OPENING_STATEMENT_PROMPT] * num_agents
+        responses = respond_all(agents, opening_prompts, system_prompts, sequential)
+        for i, response in enumerate(responses):
+            logger.log({"round": 0, "agent": i, "stance": stances[i], "model": agent_models[i], "message": response, "type": "opening_statement"})
+            if not quiet:
+                print(f"Agent {i} ({stances[i]}, {agent_models[i]}): {response}\n")
+        logger.flush()
     
-    # --- DEBATE ROUNDS ---
-    for round_num in range(1, rounds + 1):
-        print(f"\n--- ROUND {round_num} ---")
+        # --- DEBATE ROUNDS ---
+        for round_num in range(1, rounds + 1):
+            print(f"\n--- ROUND {round_num} ---")
         
-        for i, agent in enumerate(agents):
-            # Get previous messages from all agents in the last round (or opening statements)
-            previous_messages = []
-            current_transcripts = load_jsonl(transcript_path)
+            # Agents only respond to the previous round (or the opening statements),
+            # so every agent gets the same prompt and the LLM calls can be sent
+            # concurrently. Build it once for the whole round.
+            previous_statements = "\n\n".join(
+                f"Agent {record['agent']} ({record['stance']}, {record['model']}): {record['message']}"
+                for record in logger.by_round[round_num - 1]
+            )
+            round_prompts = [build_response_prompt(previous_statements)] * num_agents
             
-            for record in current_transcripts:
-                if record.get("round") == round_num - 1:
-                    msg = f"Agent {record['agent']} ({record['stance']}, {record['model']}): {record['message']}"
-                    previous_messages.append(msg)
+            responses = respond_all(agents, round_prompts, system_prompts, sequential)
+            for i, response in enumerate(responses):
+                logger.log({"round": round_num, "agent": i, "stance": stances[i], "model": agent_models[i], "message": response, "type": "debate_response"})
+                if not quiet:
+                    print(f"Agent {i} ({stances[i]}, {agent_models[i]}): {response}\n")
+            logger.flush()
 
-            previous_statements = "\n\n".join(previous_messages)
-            
-            system_prompt = DEBATE_AGENT_SYSTEM_PROMPT.format(topic=topic_question, stance=stances[i])
-            response_prompt = DEBATE_RESPONSE_PROMPT.format(previous_statements=previous_statements)
-            full_prompt = f"{system_prompt}\n\n{response_prompt}"
-            
-            response = agent.respond(full_prompt)
-            logger.log({"round": round_num, "agent": i, "stance": stances[i], "model": agent_models[i], "message": response, "type": "debate_response"})
-            print(f"Agent {i} ({stances[i]}, {agent_models[i]}): {response}\n")
-
-    # --- JUDGING PHASE ---
-    print("\n" + "=" * 60)
-    print("--- JUDGING ---")
-    transcripts = load_jsonl(transcript_path)
-    winner_id, justification = judge.pick_winner(transcripts)
+        # --- JUDGING PHASE ---
+        print("\n" + "=" * 60)
+        print("--- JUDGING ---")
+        # The logger already holds every record, so there is no need to re-read the file
+        winner_id, justification = judge.pick_winner(logger.records)
     
-    logger.log({"event": "verdict", "winner": winner_id, "justification": justification})
+        logger.log({"event": "verdict", "winner": winner_id, "justification": justification})
     
     print(f"WINNER: Agent {winner_id}")
     print(f"Justification: {justification}")
     
     # --- SAVE METADATA ---
-    duration_seconds = time.time() - start_time
+    duration_seconds = time.perf_counter() - start_perf
     metadata = {
         "debate_config": config,
         "topic_question": topic_question,
         "timing": {
-            "start_time": datetime.fromtimestamp(start_time).isoformat(),
+            "start_time": start_time.isoformat(),
             "end_time": datetime.now().isoformat(),
             "duration_seconds": round(duration_seconds, 2)
         },
@@ -230,14 +293,11 @@ def run_debate(config: Dict[str, Any]) -> None:
             "justification": justification,
             "transcript_file": os.path.basename(transcript_path)
         },
-        "system_info": {
-            "platform": platform.platform(),
-            "python_version": platform.python_version(),
-        }
+        "system_info": system_info()
     }
     
-    with open(metadata_path, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, indent=4)
+    with open(metadata_path, 'wb') as f:
+        f.write(json_dumps_pretty(metadata))
         
     print("\n" + "=" * 60)
     print(f"Debate finished. Results saved in: {results_folder}")
@@ -246,5 +306,16 @@ def run_debate(config: Dict[str, Any]) -> None:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a multi-agent debate.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always query Ollama instead of reusing cached responses from earlier runs.")
+    parser.add_argument("--sequential", action="store_true",
+                        help="Query the agents one after another instead of concurrently.")
+    parser.add_argument("--quiet", action="store_true",
+                        help="Don't print every agent message (they are still saved to the transcript).")
+    args = parser.parse_args()
+    if args.no_cache:
+        set_cache_enabled(False)
+
     debate_configuration = get_user_config()
-    run_debate(debate_configuration) 
\ No newline at end of file
+    run_debate(debate_configuration, sequential=args.sequential, quiet=args.quiet) 
\ No newline at end of file
@@ -4,48 +4,37 @@ Generate an audio recording of a debate from its transcript file.
 This script reads the transcript.jsonl and metadata.json from a debate
 results folder, compiles a script, and uses gTTS (Google Text-to-Speech)
 to create an MP3 audio file of the debate.
+
+Each paragraph of the script is synthesized as a separate request, several
+at a time, and the resulting MP3 clips are concatenated in order.
 """
 
 import argparse
-import json
+import hashlib
+import io
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
 
-try:
-    from gtts import gTTS
-except ImportError:
-    print("Error: The gTTS library is not installed.")
-    print("Please install it by running: pip install gTTS")
-    sys.exit(1)
-
-
-def load_jsonl(file_path: str) -> list:
-    """Load records from a JSONL file."""
-    records = []
-    if not os.path.exists(file_path):
-        print(f"Error: Transcript file not found at {file_path}")
-        return records
-        
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            if line.strip():
-                records.append(json.loads(line))
-    return records
+from utils import iter_jsonl, load_json
 
+# gTTS requests are network-bound, so a handful of threads in flight is plenty
+AUDIO_WORKERS = 8
 
-def load_json(file_path: str) -> dict:
-    """Load a standard JSON file."""
-    if not os.path.exists(file_path):
-        print(f"Error: Metadata file not found at {file_path}")
-        return None
+# Transcript record types that carry an agent's speech
+SPEECH_TYPES = frozenset({"opening_statement", "debate_response"})
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+# Synthesized paragraphs are kept here, keyed by a hash of their text, so
+# re-running the script (or a retry after a network error) only fetches what's missing
+TTS_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".tts_cache")
 
 
-def create_debate_script(transcript: list, metadata: dict) -> str:
+def create_debate_script(transcript: Iterable[dict], metadata: dict) -> list:
     """
-    Create a formatted string script of the entire debate for TTS.
+    Create the script of the entire debate for TTS, one paragraph per entry.
+
+    The transcript is only iterated once, so it can be a lazy iterator.
     """
     script_lines = []
     
@@ -61,8 +50,7 @@ def create_debate_script(transcript: list, metadata: dict) -> str:
     # Process debate rounds
     last_round = -1
     for record in transcript:
-        event_type = record.get("type")
-        if event_type in ["opening_statement", "debate_response"]:
+        if record.get("type") in SPEECH_TYPES:
             round_num = record.get("round")
             
             # Announce new round
@@ -81,17 +69,52 @@ def create_debate_script(transcript: list, metadata: dict) -> str:
             line = f"Agent {agent_id}, using model {model}, arguing '{stance}', says: {message}"
             script_lines.append(line)
             
-    # Verdict
-    verdict_record = next((r for r in transcript if r.get("event") == "verdict"), None)
-    if verdict_record:
-        winner = verdict_record.get("winner")
-        justification = verdict_record.get("justification")
+    # Verdict (the orchestrator also records it in the metadata's results)
+    verdict = metadata.get("results", {})
+    if "winner" in verdict:
+        winner = verdict.get("winner")
+        justification = verdict.get("justification")
         
         script_lines.append("The debate has concluded. The judge will now deliver the verdict.")
         script_lines.append(f"The winner is Agent {winner}.")
         script_lines.append(f"The judge's justification is as follows: {justification}")
     
-    return "\n\n".join(script_lines)
+    return script_lines
+
+
+def synthesize_segment(text: str) -> bytes:
+    """Synthesize one script paragraph and return the MP3 bytes, using the on-disk cache."""
+    cache_path = os.path.join(TTS_CACHE_DIR, hashlib.sha1(text.encode('utf-8')).hexdigest() + ".mp3")
+    if os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            return f.read()
+
+    from gtts import gTTS  # Already loaded by main(), so this is a dict lookup
+    buffer = io.BytesIO()
+    gTTS(text=text, lang='en', slow=False).write_to_fp(buffer)
+    audio = buffer.getvalue()
+
+    # Write to a temporary name first so an interrupted run never leaves a truncated clip
+    os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+    with open(cache_path + ".tmp", 'wb') as f:
+        f.write(audio)
+    os.replace(cache_path + ".tmp", cache_path)
+    return audio
+
+
+def synthesize_script(script_lines: list, output_file: str) -> None:
+    """Synthesize every paragraph concurrently and write the clips in script order."""
+    # Blank paragraphs have nothing to say, and identical ones (e.g. the same
+    # error message from a failing agent) only need synthesizing once
+    script_lines = [line for line in script_lines if line.strip()]
+    unique_lines = list(dict.fromkeys(script_lines))
+    with ThreadPoolExecutor(max_workers=AUDIO_WORKERS) as pool:
+        audio_by_line = dict(zip(unique_lines, pool.map(synthesize_segment, unique_lines)))
+    audio_segments = [audio_by_line[line] for line in script_lines]
+
+    # MP3 is a stream of independent frames, so the clips can simply be appended
+    with open(output_file, 'wb') as f:
+        f.writelines(audio_segments)
 
 
 def main():
@@ -116,24 +139,34 @@ def main():
     metadata_file = os.path.join(args.debate_folder, "metadata.json")
     output_audio_file = os.path.join(args.debate_folder, "debate_audio.mp3")
 
-    # Load data
+    # Load data. The transcript is streamed record by record while the
+    # script is built, so check that it exists up front.
     print("Loading debate data...")
-    transcript_data = load_jsonl(transcript_file)
     metadata = load_json(metadata_file)
+    transcript_found = os.path.exists(transcript_file)
+    if not transcript_found:
+        print(f"Error: Transcript file not found at {transcript_file}")
 
-    if not transcript_data or not metadata:
+    if not transcript_found or not metadata:
         print("Could not load necessary files. Aborting.")
         sys.exit(1)
 
     # Create script
     print("Generating debate script...")
-    debate_script = create_debate_script(transcript_data, metadata)
+    debate_script = create_debate_script(iter_jsonl(transcript_file), metadata)
     
-    # Generate audio
-    print("Generating audio using gTTS. This may take a moment...")
+    # Generate audio. gTTS is imported only now, so --help and path errors
+    # don't pay for loading it.
+    try:
+        import gtts  # noqa: F401
+    except ImportError:
+        print("Error: The gTTS library is not installed.")
+        print("Please install it by running: pip install gTTS")
+        sys.exit(1)
+
+    print(f"Generating audio for {len(debate_script)} segments using gTTS. This may take a moment...")
     try:
-        tts = gTTS(text=debate_script, lang='en', slow=False)
-        tts.save(output_audio_file)
+        synthesize_script(debate_script, output_audio_file)
         print(f"\nSuccessfully saved debate audio to: {output_audio_file}")
     except Exception as e:
         print(f"\nAn error occurred while generating the audio file: {e}")
@@ -5,10 +5,19 @@ Prompt templates for the multi-agent debate system.
 - OPENING_STATEMENT_PROMPT: The prompt for the opening statement.
 - DEBATE_RESPONSE_PROMPT: The prompt for the debate response.
 - JUDGE_SYSTEM_PROMPT: The system prompt for the judge.
+- JUDGE_TRANSCRIPT_PROMPT: The user prompt carrying the transcript for the judge.
+
+Keep {previous_statements} at the end of DEBATE_RESPONSE_PROMPT so the fixed
+instructions come first and every round's prompt shares that prefix.
+
+The system prompts are sent as separate system messages. They don't change
+between calls, so Ollama can reuse its cached evaluation of them.
 
 Feel free to modify the prompts to your liking and add more prompts as needed.
 """
 
+import re
+
 
 
 
@@ -39,11 +48,11 @@ Please provide a strong and clear opening statement based on your assigned stanc
 
 
 DEBATE_RESPONSE_PROMPT = """
+Based on your assigned stance and the other agents' arguments below, provide a compelling response.
+Address their points and reinforce your own position. Do not sound like a robot or over pompous. Be concise and to the point, use no more than 100 words or less.
+
 Here are the previous statements from other agents:
 {previous_statements}
-
-Based on your assigned stance and their arguments, provide a compelling response.
-Address their points and reinforce your own position. Do not sound like a robot or over pompous. Be concise and to the point, use no more than 100 words or less.
 """
 
 
@@ -57,9 +66,7 @@ Address their points and reinforce your own position. Do not sound like a robot
 JUDGE_SYSTEM_PROMPT = """You are an impartial judge in a multi-agent debate. Your task is to determine the winner based on the provided transcript.
 Analyze the arguments of each agent for clarity, persuasiveness, consistency, and how well they responded to their opponents.
 
-The debate transcript is provided below. Each entry has a round number, the agent ID, and their message.
-
-{transcript}
+You will be given the debate transcript. Each entry has a round number, the agent ID, and their message.
 
 After reviewing the entire debate, you must declare a winner.
 Your output MUST be in the following format, and nothing else:
@@ -69,4 +76,38 @@ Justification: <Your detailed justification for choosing the winner.>
 
 Replace <X> with the agent number you have chosen as the winner.
 Replace <Your detailed justification...> with your reasoning. Do not include any other text before "Winner:" or after your justification.
-""" 
\ No newline at end of file
+"""
+
+
+JUDGE_TRANSCRIPT_PROMPT = """The debate transcript:
+
+{transcript}
+"""
+
+
+def _split_template(template: str, *fields: str) -> list:
+    """
+    Split a template at its {field} placeholders, once at import.
+
+    Odd-indexed items of the result are field names, the rest literal text, so
+    filling it in is plain concatenation instead of parsing the template again.
+    """
+    return re.split(r"\{(" + "|".join(fields) + r")\}", template)
+
+
+def _fill(parts: list, values: dict) -> str:
+    return "".join(values[part] if i % 2 else part for i, part in enumerate(parts))
+
+
+_SYSTEM_PROMPT_PARTS = _split_template(DEBATE_AGENT_SYSTEM_PROMPT, "topic", "stance")
+_RESPONSE_PROMPT_PARTS = _split_template(DEBATE_RESPONSE_PROMPT, "previous_statements")
+
+
+def build_system_prompt(topic: str, stance: str) -> str:
+    """Fill in DEBATE_AGENT_SYSTEM_PROMPT for one agent."""
+    return _fill(_SYSTEM_PROMPT_PARTS, {"topic": topic, "stance": stance})
+
+
+def build_response_prompt(previous_statements: str) -> str:
+    """Fill in DEBATE_RESPONSE_PROMPT with the previous round's statements."""
+    return _fill(_RESPONSE_PROMPT_PARTS, {"previous_statements": previous_statements})
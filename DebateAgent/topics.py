@@ -11,6 +11,9 @@ DEBATE_TOPICS = {
     "college_free": "Higher education (college and university) should be provided free of charge to all qualified students.",
 }
 
+# Set of valid keys for fast membership checks
+TOPIC_KEYS = frozenset(DEBATE_TOPICS)
+
 
 def get_topic(topic_key: str) -> str:
     """
@@ -30,6 +33,11 @@ def list_topic_keys() -> list:
     return list(DEBATE_TOPICS.keys())
 
 
+def get_topic_keys() -> frozenset:
+    """Return the set of topic keys, for validating user input."""
+    return TOPIC_KEYS
+
+
 def list_topics() -> None:
     """Print all available topics."""
     print("Available Debate Topics:")
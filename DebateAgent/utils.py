@@ -0,0 +1,83 @@
+"""
+JSON helpers shared by the debate scripts.
+
+orjson is used when it is installed (much faster encoding and decoding); the
+standard library json module is the fallback.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_dumps_bytes(record: Dict[str, Any]) -> bytes:
+    """Serialize a record to UTF-8 JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record).encode('utf-8')
+
+
+def json_dumps_pretty(data: Dict[str, Any]) -> bytes:
+    """Serialize to indented UTF-8 JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def json_loads(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# (second, formatted "YYYY-MM-DDTHH:MM:SS") for the last second ns_to_iso saw.
+# Records are logged many times a second, so only the fraction usually changes.
+_iso_second_cache = (None, "")
+
+
+def ns_to_iso(timestamp_ns: int) -> str:
+    """
+    Format nanoseconds since the epoch as a naive UTC ISO-8601 string.
+
+    Matches datetime.utcnow().isoformat(), the format of transcript timestamps,
+    but only builds a datetime once per second and otherwise just appends the
+    microseconds to the cached prefix, which makes it cheaper than utcnow().
+    """
+    global _iso_second_cache
+    seconds, nanoseconds = divmod(timestamp_ns, 1_000_000_000)
+    cached_second, prefix = _iso_second_cache
+    if seconds != cached_second:
+        prefix = datetime.fromtimestamp(seconds, tz=timezone.utc).replace(tzinfo=None).isoformat()
+        _iso_second_cache = (seconds, prefix)
+    microseconds = nanoseconds // 1000
+    # isoformat() leaves out a zero fraction, so match that
+    return f"{prefix}.{microseconds:06d}" if microseconds else prefix
+
+
+def iter_jsonl(file_path: str) -> Iterator[Dict[str, Any]]:
+    """Yield records from a JSONL file one at a time, without loading the whole file."""
+    if not os.path.exists(file_path):
+        print(f"Error: Transcript file not found at {file_path}")
+        return
+
+    with open(file_path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield json_loads(line)
+
+
+def load_json(file_path: str) -> Dict[str, Any]:
+    """Load a standard JSON file."""
+    if not os.path.exists(file_path):
+        print(f"Error: Metadata file not found at {file_path}")
+        return None
+
+    with open(file_path, 'rb') as f:
+        return json_loads(f.read())
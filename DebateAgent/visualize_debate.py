@@ -3,10 +3,12 @@ Generate an HTML visualization of a debate from its transcript file.
 """
 
 import argparse
-import json
 import os
 import sys
 import html
+from typing import Iterable, Iterator
+
+from utils import iter_jsonl, load_json
 
 # A simple color palette for the agent avatars
 AGENT_COLORS = [
@@ -14,6 +16,10 @@ AGENT_COLORS = [
     "#8A6FDF", "#3C8DAD", "#E87EA1", "#F8A553"
 ]
 
+# The palette cycled out to a color per agent id, so the usual small ids
+# index it directly; larger ids fall back to wrapping around AGENT_COLORS
+AVATAR_COLOR_BY_ID = [AGENT_COLORS[i % len(AGENT_COLORS)] for i in range(64)]
+
 HTML_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="en">
@@ -115,30 +121,41 @@ HTML_TEMPLATE = """
 </html>
 """
 
-def load_jsonl(file_path: str) -> list:
-    """Load records from a JSONL file."""
-    records = []
-    if not os.path.exists(file_path):
-        print(f"Error: Transcript file not found at {file_path}")
-        return records
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            if line.strip():
-                records.append(json.loads(line))
-    return records
-
-def load_json(file_path: str) -> dict:
-    """Load a standard JSON file."""
-    if not os.path.exists(file_path):
-        print(f"Error: Metadata file not found at {file_path}")
-        return None
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def generate_html(transcript: list, metadata: dict) -> str:
-    """Generates the final HTML content from the transcript data."""
+# The page is written out in pieces: everything before the chat log
+# (formatted with the topic), the messages, then the closing tags
+HTML_HEAD, HTML_TAIL = HTML_TEMPLATE.split("{chat_messages}")
+HTML_TAIL = HTML_TAIL.format()  # Unescape the doubled braces
+
+# Fragments filled in once per transcript record
+MESSAGE_TEMPLATE = """
+            <div class="message">
+                <div class="avatar" style="background-color: {color};">{initial}</div>
+                <div class="message-content">
+                    <div class="meta-info">{meta_info}</div>
+                    <div class="message-text">{text}</div>
+                </div>
+            </div>
+            """
+
+VERDICT_TEMPLATE = """
+            <div class="verdict">
+                <h2>Judge's Verdict</h2>
+                <p><strong>Winner:</strong> Agent {winner}</p>
+                <p><strong>Justification:</strong> {justification}</p>
+            </div>
+            """
+
+def iter_html(transcript: Iterable[dict], metadata: dict) -> Iterator[str]:
+    """Yield the HTML page piece by piece while iterating the transcript once."""
     topic = metadata.get("topic_question", "Debate Topic")
-    chat_messages_html = ""
+    yield HTML_HEAD.format(topic=html.escape(topic))
+
+    # Local names are faster to look up than globals in the per-record loop
+    escape = html.escape
+    colors = AGENT_COLORS
+    num_colors = len(colors)
+    color_by_id = AVATAR_COLOR_BY_ID
+    num_ids = len(color_by_id)
 
     for record in transcript:
         event = record.get("event")
@@ -150,33 +167,28 @@ def generate_html(transcript: list, metadata: dict) -> str:
             model = record.get('model', 'Unknown')
             message = record.get('message', '')
 
-            avatar_color = AGENT_COLORS[agent_id % len(AGENT_COLORS)]
+            avatar_color = color_by_id[agent_id] if 0 <= agent_id < num_ids else colors[agent_id % num_colors]
             avatar_initial = f"A{agent_id}"
             
-            meta_info = f"<strong>Agent {agent_id}</strong> ({html.escape(model)}) | Stance: {html.escape(stance)}"
+            meta_info = f"<strong>Agent {agent_id}</strong> ({escape(model)}) | Stance: {escape(stance)}"
             
-            chat_messages_html += f"""
-            <div class="message">
-                <div class="avatar" style="background-color: {avatar_color};">{avatar_initial}</div>
-                <div class="message-content">
-                    <div class="meta-info">{meta_info}</div>
-                    <div class="message-text">{html.escape(message)}</div>
-                </div>
-            </div>
-            """
+            yield MESSAGE_TEMPLATE.format(
+                color=avatar_color, initial=avatar_initial, meta_info=meta_info, text=escape(message)
+            )
         elif event == "verdict":
             winner = record.get("winner", "N/A")
             justification = record.get("justification", "No justification provided.")
             
-            chat_messages_html += f"""
-            <div class="verdict">
-                <h2>Judge's Verdict</h2>
-                <p><strong>Winner:</strong> Agent {html.escape(str(winner))}</p>
-                <p><strong>Justification:</strong> {html.escape(justification)}</p>
-            </div>
-            """
-            
-    return HTML_TEMPLATE.format(topic=html.escape(topic), chat_messages=chat_messages_html)
+            yield VERDICT_TEMPLATE.format(
+                winner=escape(str(winner)), justification=escape(justification)
+            )
+
+    yield HTML_TAIL
+
+
+def generate_html(transcript: Iterable[dict], metadata: dict) -> str:
+    """Generates the final HTML content from the transcript data (iterated once)."""
+    return "".join(iter_html(transcript, metadata))
 
 
 def main():
@@ -197,19 +209,22 @@ def main():
     metadata_file = os.path.join(args.debate_folder, "metadata.json")
     output_html_file = os.path.join(args.debate_folder, "debate_visualization.html")
 
+    # The transcript is streamed record by record while the HTML is built,
+    # so check that it exists up front.
     print("Loading debate data...")
-    transcript_data = load_jsonl(transcript_file)
     metadata = load_json(metadata_file)
+    transcript_found = os.path.exists(transcript_file)
+    if not transcript_found:
+        print(f"Error: Transcript file not found at {transcript_file}", file=sys.stderr)
 
-    if not transcript_data or not metadata:
+    if not transcript_found or not metadata:
         print("Could not load necessary files. Aborting.", file=sys.stderr)
         sys.exit(1)
 
     print("Generating HTML visualization...")
-    html_content = generate_html(transcript_data, metadata)
-
+    # Write the page as it is generated rather than building it in memory first
     with open(output_html_file, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+        f.writelines(iter_html(iter_jsonl(transcript_file), metadata))
     
     print(f"\nSuccessfully created debate visualization!")
     print(f"You can open this file in your browser: {output_html_file}")
@@ -1,4 +1,5 @@
 # Import necessary libraries for building a RAG (Retrieval-Augmented Generation) system
+import re  # For the regular expression used to tokenize text for BM25
 import streamlit as st  # Web app framework for creating the user interface
 
 # LangChain imports for document processing and RAG functionality
@@ -9,7 +10,6 @@ from langchain_ollama import OllamaEmbeddings  # For creating embeddings using O
 from langchain_core.prompts import ChatPromptTemplate  # For creating structured prompts
 from langchain_ollama.llms import OllamaLLM  # For using Ollama language models
 from langchain_community.retrievers import BM25Retriever  # For keyword-based document retrieval
-from nltk.tokenize import word_tokenize  # For tokenizing text (splitting into words)
 from langchain.retrievers import EnsembleRetriever  # For combining multiple retrieval methods
 
 # Define the prompt template that will be used to generate answers
@@ -29,6 +29,16 @@ pdfs_directory = '/storage/home/hcoda1/3/adeza3/p-phentenryck3-1/adeza3/MultiAge
 # Using deepseek-r1:14b model for generating responses
 model = OllamaLLM(model="deepseek-r1:14b")
 
+# Build the prompt and the prompt -> model chain once at startup
+# The template never changes, so there is no need to re-parse it for every question
+prompt = ChatPromptTemplate.from_template(template)
+chain = prompt | model
+
+# Tokenizer for BM25: a word is any run of letters, digits or underscores
+# Unlike NLTK's word_tokenize it drops punctuation instead of keeping it as tokens
+# (which keyword matching doesn't need), and is much faster on large PDFs
+token_pattern = re.compile(r"\w+")
+
 def upload_pdf(file):
     """
     Save the uploaded PDF file to the designated directory.
@@ -122,8 +132,45 @@ def build_bm25_retriever(documents):
         BM25Retriever: A keyword-based retriever object
     """
     # Create BM25 retriever with word tokenization preprocessing
-    # word_tokenize splits text into individual words for indexing
-    return BM25Retriever.from_documents(documents, preprocess_func=word_tokenize)
+    # token_pattern.findall splits text into individual words for indexing
+    return BM25Retriever.from_documents(documents, preprocess_func=token_pattern.findall)
+
+@st.cache_resource(show_spinner="Indexing PDF...")
+def build_hybrid_retriever(file_path, file_bytes):
+    """
+    Load, split and index a PDF, returning a hybrid (semantic + BM25) retriever.
+    
+    Streamlit re-runs the whole script on every question, so the retriever is
+    cached: the PDF is only embedded once, and later questions go straight to
+    retrieval. The file contents are part of the cache key, so uploading a
+    changed file with the same name builds a fresh index.
+    
+    Args:
+        file_path (str): Path to the saved PDF file
+        file_bytes (bytes): Contents of the PDF (only used as the cache key)
+        
+    Returns:
+        EnsembleRetriever: A retriever combining both retrieval methods
+    """
+    # Load and parse the PDF document
+    documents = load_pdf(file_path)
+    
+    # Split the document into smaller, manageable chunks
+    chunked_documents = split_text(documents)
+
+    # Build two different types of retrievers
+    # Semantic retriever: finds documents based on meaning/context
+    semantic_retriever = build_semantic_retriever(chunked_documents)
+    
+    # BM25 retriever: finds documents based on keyword matching
+    bm25_retriever = build_bm25_retriever(chunked_documents)
+    
+    # Create a hybrid retriever that combines both approaches
+    # This gives us the benefits of both semantic and keyword-based search
+    return EnsembleRetriever(
+        retrievers=[semantic_retriever, bm25_retriever],  # List of retrievers to combine
+        weights=[0.5, 0.5]                                # Equal weight to both methods
+    )
 
 def answer_question(question, documents):
     """
@@ -131,7 +178,7 @@ def answer_question(question, documents):
     
     This function:
     1. Combines all retrieved documents into a single context
-    2. Uses the predefined prompt template
+    2. Fills the predefined prompt template (built once at startup)
     3. Invokes the language model to generate an answer
     
     Args:
@@ -143,15 +190,9 @@ def answer_question(question, documents):
     """
     # Combine all document contents into a single context string
     # Each document is separated by double newlines for readability
-    context = "\n\n".join([doc.page_content for doc in documents])
-    
-    # Create a prompt using the template with the question and context
-    prompt = ChatPromptTemplate.from_template(template)
-    
-    # Create a chain that combines the prompt with the language model
-    chain = prompt | model
+    context = "\n\n".join(doc.page_content for doc in documents)
 
-    # Invoke the chain with the question and context to get an answer
+    # Invoke the shared chain with the question and context to get an answer
     return chain.invoke({"question": question, "context": context})
 
 # === STREAMLIT USER INTERFACE ===
@@ -168,25 +209,9 @@ if uploaded_file:
     # Step 1: Save the uploaded file to the server
     upload_pdf(uploaded_file)
     
-    # Step 2: Load and parse the PDF document
-    documents = load_pdf(pdfs_directory + uploaded_file.name)
-    
-    # Step 3: Split the document into smaller, manageable chunks
-    chunked_documents = split_text(documents)
-
-    # Step 4: Build two different types of retrievers
-    # Semantic retriever: finds documents based on meaning/context
-    semantic_retriever = build_semantic_retriever(chunked_documents)
-    
-    # BM25 retriever: finds documents based on keyword matching
-    bm25_retriever = build_bm25_retriever(chunked_documents)
-    
-    # Step 5: Create a hybrid retriever that combines both approaches
-    # This gives us the benefits of both semantic and keyword-based search
-    hybrid_retriever = EnsembleRetriever(
-        retrievers=[semantic_retriever, bm25_retriever],  # List of retrievers to combine
-        weights=[0.5, 0.5]                                # Equal weight to both methods
-    )
+    # Steps 2-5: Load, split and index the PDF into a hybrid retriever
+    # (cached, so this only does real work the first time a file is seen)
+    hybrid_retriever = build_hybrid_retriever(pdfs_directory + uploaded_file.name, uploaded_file.getvalue())
 
     # Create a chat input widget for user questions
     question = st.chat_input()
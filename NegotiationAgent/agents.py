@@ -2,9 +2,33 @@
 Agent classes for the multi-agent negotiation system.
 """
 import re
-from ollama_utils import ollama_query
+from functools import lru_cache
+from ollama_utils import ollama_query, ollama_query_stream
+from config import MAX_OFFER_TOKENS
 from prompts import BUYER_PROMPT, SELLER_PROMPT, MODERATOR_PROMPT
 
+# Compiled once at import; parse_price runs on every negotiation turn. Any
+# spacing after the colon is accepted ("Price:$50", "Price:  $50").
+_PRICE_RE = re.compile(r"Price:\s*\$?(\d+\.?\d*)", re.IGNORECASE)
+# The Seller and Buyer replies end with their price on its own line, so
+# generation can stop once a line starting with a complete "Price: $XX" has
+# been followed by whitespace. Anchoring to the line start keeps a mention
+# mid-sentence ("the list price: $500 is steep") from cutting the reply short.
+PRICE_LINE_DONE = r"(?m)^\s*Price:\s*\$?\d+\.?\d*\s"
+
+# Pure function of the response text, so repeated responses (low temperature,
+# seed sweeps, cached LLM answers) skip the parsing entirely
+@lru_cache(maxsize=4096)
+def parse_price(response: str) -> (float, str):
+    """Extracts the price from the agent's response text."""
+    price_match = _PRICE_RE.search(response)
+    if price_match:
+        price = float(price_match.group(1))
+        # Clean the response by removing the price line
+        cleaned_response = response[:price_match.start()].strip()
+        return price, cleaned_response
+    return None, response # Return the original response if no price is found
+
 class Agent:
     """Base class for all negotiation agents."""
     def __init__(self, model: str, temp: float, seed: int):
@@ -12,13 +36,23 @@ class Agent:
         self.temp = temp
         self.seed = seed
 
-    def _query_llm(self, prompt: str) -> str:
-        """Helper to query the LLM with simple retry logic."""
+    def _query_llm(self, prompt: str, stop_pattern: str = None) -> str:
+        """
+        Helper to query the LLM with simple retry logic.
+
+        With a stop_pattern the reply is streamed and cut off as soon as it matches.
+        """
         try:
+            if stop_pattern:
+                return ollama_query_stream(self.model, prompt, self.temp, self.seed, stop_pattern,
+                                           num_predict=MAX_OFFER_TOKENS)
             return ollama_query(self.model, prompt, self.temp, self.seed)
         except Exception as e:
             print(f"Error querying model {self.model}: {e}. Retrying...")
             try:
+                if stop_pattern:
+                    return ollama_query_stream(self.model, prompt, self.temp, self.seed + 1, stop_pattern,
+                                               num_predict=MAX_OFFER_TOKENS)
                 return ollama_query(self.model, prompt, self.temp, self.seed + 1)
             except Exception as e2:
                 print(f"Retry failed for {self.model}: {e2}")
@@ -26,30 +60,36 @@ class Agent:
 
     def parse_price(self, response: str) -> (float, str):
         """Extracts the price from the agent's response text."""
-        price_match = re.search(r"Price: \$?(\d+\.?\d*)", response, re.IGNORECASE)
-        if price_match:
-            price = float(price_match.group(1))
-            # Clean the response by removing the price line
-            cleaned_response = response[:price_match.start()].strip()
-            return price, cleaned_response
-        return None, response # Return the original response if no price is found
+        return parse_price(response)
+
+    @staticmethod
+    def _fill_around_history(template: str, **fields) -> (str, str):
+        """
+        Fill in everything except {chat_history}, returning the text before and after it.
+
+        The scenario is fixed for the whole negotiation, so the Seller and Buyer
+        format their prompt once and only splice in the history on each turn.
+        """
+        prefix, suffix = template.split("{chat_history}")
+        return prefix.format(**fields), suffix.format(**fields)
 
 class SellerAgent(Agent):
     """Represents the Seller in the negotiation."""
     def __init__(self, model: str, temp: float, seed: int, scenario: dict):
         super().__init__(model, temp, seed)
         self.scenario = scenario
+        self._prompt_prefix, self._prompt_suffix = self._fill_around_history(
+            SELLER_PROMPT,
+            scenario_name=scenario['name'],
+            item_name=scenario['item_name'],
+            list_price=scenario['list_price'],
+            min_price=scenario['seller_min_price'],
+            personality=scenario['seller_personality'],
+        )
 
     def act(self, chat_history: str) -> (float, str):
-        prompt = SELLER_PROMPT.format(
-            scenario_name=self.scenario['name'],
-            item_name=self.scenario['item_name'],
-            list_price=self.scenario['list_price'],
-            min_price=self.scenario['seller_min_price'],
-            personality=self.scenario['seller_personality'],
-            chat_history=chat_history
-        )
-        response = self._query_llm(prompt)
+        prompt = self._prompt_prefix + chat_history + self._prompt_suffix
+        response = self._query_llm(prompt, PRICE_LINE_DONE)
         return self.parse_price(response)
 
 class BuyerAgent(Agent):
@@ -57,18 +97,19 @@ class BuyerAgent(Agent):
     def __init__(self, model: str, temp: float, seed: int, scenario: dict):
         super().__init__(model, temp, seed)
         self.scenario = scenario
+        self._prompt_prefix, self._prompt_suffix = self._fill_around_history(
+            BUYER_PROMPT,
+            scenario_name=scenario['name'],
+            item_name=scenario['item_name'],
+            list_price=scenario['list_price'],
+            target_price=scenario['buyer_target_price'],
+            max_price=scenario['buyer_max_price'],
+            desire_level=scenario['buyer_desire_level'],
+        )
 
     def act(self, chat_history: str) -> (float, str):
-        prompt = BUYER_PROMPT.format(
-            scenario_name=self.scenario['name'],
-            item_name=self.scenario['item_name'],
-            list_price=self.scenario['list_price'],
-            target_price=self.scenario['buyer_target_price'],
-            max_price=self.scenario['buyer_max_price'],
-            desire_level=self.scenario['buyer_desire_level'],
-            chat_history=chat_history
-        )
-        response = self._query_llm(prompt)
+        prompt = self._prompt_prefix + chat_history + self._prompt_suffix
+        response = self._query_llm(prompt, PRICE_LINE_DONE)
         return self.parse_price(response)
 
 class ModeratorAgent(Agent):
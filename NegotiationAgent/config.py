@@ -2,4 +2,15 @@
 
 DEFAULT_MODEL = "phi3"
 DEFAULT_TEMP = 0.8  # A slightly higher temperature for more creative negotiation tactics
-DEFAULT_SEED = 42 
\ No newline at end of file
+DEFAULT_SEED = 42
+
+# Stop early when the gap between the offers widens this many rounds in a row
+DIVERGENCE_PATIENCE = 2
+
+# Upper bound on tokens generated per Seller/Buyer turn. The prompts ask for at
+# most 100 words plus a price line, so this only cuts off runaway replies.
+MAX_OFFER_TOKENS = 256
+
+# Most negotiations a seed sweep runs at once. Each one mostly waits on Ollama,
+# which only serves OLLAMA_NUM_PARALLEL requests at a time anyway.
+MAX_SWEEP_WORKERS = 4
@@ -1,5 +1,19 @@
+import os
+import re
+import sys
+
 from ollama import ListResponse, list
-from ollama import chat 
+from ollama import Client
+
+# response_cache is shared with the other agent projects and lives in the
+# repository's shared/ package
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from shared.response_cache import cached
+
+
+# One HTTP client shared by every agent, so requests reuse open keep-alive
+# connections to the Ollama server (host is read from OLLAMA_HOST)
+client = Client()
 
 
 OLLAMA_NICKNAMES= {
@@ -28,6 +42,7 @@ def print_ollama_models():
         print('\n')
 
 
+@cached
 def ollama_query(ollama_model:str,
                  prompt_to_LLM:str,
                  temperature:float,
@@ -37,12 +52,13 @@ def ollama_query(ollama_model:str,
                  top_p: float = 0.9,
                  min_p: float = 0.05,
                  repeat_penalty: float = 1.1,
+                 num_predict: int = -1,
                  ):
     """
     See https://github.com/ollama/ollama/blob/main/docs/api.md#generate-request-with-options
     and https://github.com/ollama/ollama/blob/main/docs/modelfile.md for explanations
     """
-    response = chat(
+    response = client.chat(
             model=ollama_model,
             options={
                 "temperature":temperature,
@@ -51,7 +67,8 @@ def ollama_query(ollama_model:str,
                  "top_k": top_k,
                  "top_p": top_p,
                  "min_p": min_p,
-                 "repeat_penalty": repeat_penalty
+                 "repeat_penalty": repeat_penalty,
+                 "num_predict": num_predict
                  },
             messages=[
                 {
@@ -63,6 +80,62 @@ def ollama_query(ollama_model:str,
     ret = response['message']['content']
     return ret
 
+
+@cached
+def ollama_query_stream(ollama_model:str,
+                        prompt_to_LLM:str,
+                        temperature:float,
+                        seed:int = 0,
+                        stop_pattern:str = None,
+                        num_ctx: int = 4096,
+                        top_k: int = 40,
+                        top_p: float = 0.9,
+                        min_p: float = 0.05,
+                        repeat_penalty: float = 1.1,
+                        num_predict: int = -1,
+                        ):
+    """
+    Like ollama_query, but streams the reply and stops generating as soon as
+    the text so far matches stop_pattern (a case-insensitive regex), so the
+    model doesn't spend decode time on tokens nobody reads.
+    """
+    stop_re = re.compile(stop_pattern, re.IGNORECASE) if stop_pattern else None
+    stream = client.chat(
+            model=ollama_model,
+            options={
+                "temperature":temperature,
+                 "seed":seed,
+                 "num_ctx": num_ctx,
+                 "top_k": top_k,
+                 "top_p": top_p,
+                 "min_p": min_p,
+                 "repeat_penalty": repeat_penalty,
+                 "num_predict": num_predict
+                 },
+            messages=[
+                {
+                    'role': 'user',
+                    'content': prompt_to_LLM
+                }
+            ],
+            stream=True,
+        )
+    text = ""
+    try:
+        for chunk in stream:
+            # Only the newest chunk can complete a match, but it may have
+            # started a little earlier, so search from just before it. Searching
+            # the full text from an offset (rather than a slice) keeps ^ meaning
+            # the start of a real line.
+            search_from = max(0, len(text) - 64)
+            text += chunk['message']['content']
+            if stop_re and stop_re.search(text, search_from):
+                break
+    finally:
+        # Closing the stream drops the connection, which tells Ollama to stop
+        stream.close()
+    return text
+
  
 if __name__ == '__main__':
     print_ollama_models()
@@ -2,25 +2,50 @@
 Main orchestrator for the multi-agent negotiation system.
 """
 
+import argparse
 import json
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from agents import BuyerAgent, SellerAgent, ModeratorAgent
-from config import DEFAULT_MODEL, DEFAULT_TEMP, DEFAULT_SEED
+from config import DEFAULT_MODEL, DEFAULT_TEMP, DEFAULT_SEED, DIVERGENCE_PATIENCE, MAX_SWEEP_WORKERS
 from scenarios import list_scenarios, get_scenario, list_scenario_keys
 
+try:
+    import orjson  # Much faster JSON encoding; falls back to the stdlib if missing
+except ImportError:
+    orjson = None
+
+def json_dumps_bytes(record: Dict[str, Any]) -> bytes:
+    """Serialize a record to UTF-8 JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record).encode('utf-8')
+
+def json_dumps_pretty(data: Dict[str, Any]) -> bytes:
+    """Serialize to indented UTF-8 JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
 class JsonLogger:
-    """Simple JSONL logger."""
+    """JSONL logger that keeps its file open and buffers writes until closed."""
     def __init__(self, path: str):
         self.path = path
         self.log_records = []
+        self._file = open(path, 'ab', buffering=1 << 20)
     def log(self, record: Dict[str, Any]):
         self.log_records.append(record)
-        with open(self.path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps({"timestamp": datetime.utcnow().isoformat(), **record}) + '\n')
+        self._file.write(json_dumps_bytes({"timestamp": datetime.utcnow().isoformat(), **record}) + b'\n')
+    def close(self):
+        self._file.close()
+    def __enter__(self):
+        return self
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
 def get_user_config() -> Dict[str, Any]:
     """Interactively get negotiation settings from the user."""
@@ -57,11 +82,11 @@ def get_user_config() -> Dict[str, Any]:
         "seed": DEFAULT_SEED,
     }
 
-def create_results_folder(scenario_key: str) -> str:
-    """Create a timestamped results folder."""
+def create_results_folder(scenario_key: str, seed: int) -> str:
+    """Create a timestamped results folder (the seed keeps parallel runs apart)."""
     base_dir = os.path.join(os.path.dirname(__file__), "results")
     os.makedirs(base_dir, exist_ok=True)
-    folder_name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{scenario_key}"
+    folder_name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{scenario_key}_seed{seed}"
     results_folder = os.path.join(base_dir, folder_name)
     os.makedirs(results_folder, exist_ok=True)
     return results_folder
@@ -70,87 +95,160 @@ def format_chat_history(log_records: list) -> str:
     """Formats the log into a readable string for the prompts."""
     return "\n".join([f"{r['role']}: {r['message']}" for r in log_records if r.get('type') == 'negotiation_turn'])
 
-def run_negotiation(config: Dict[str, Any]):
-    """Main function to run the simulation."""
-    start_time = time.time()
+def run_negotiation(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Main function to run the simulation. Returns the saved metadata."""
+    start_perf = time.perf_counter()  # Monotonic, unlike time.time()
     scenario = get_scenario(config["scenario_key"])
-    results_folder = create_results_folder(config["scenario_key"])
+    results_folder = create_results_folder(config["scenario_key"], config["seed"])
     
     # Setup paths and logger
     transcript_path = os.path.join(results_folder, "transcript.jsonl")
     metadata_path = os.path.join(results_folder, "metadata.json")
     summary_path = os.path.join(results_folder, "summary.md")
-    logger = JsonLogger(transcript_path)
-    logger.log({"event": "negotiation_start", "config": config, "scenario": scenario})
-
-    # Initialize Agents
-    buyer = BuyerAgent(config["buyer_model"], config["temp"], config["seed"], scenario)
-    seller = SellerAgent(config["seller_model"], config["temp"], config["seed"] + 1, scenario)
-    moderator = ModeratorAgent(config["moderator_model"], config["temp"], config["seed"] + 2)
-
-    print("\n" + "="*60)
-    print(f"Starting Negotiation: '{scenario['item_name']}' at a {scenario['name']}")
-    print(f"Listed Price: ${scenario['list_price']}")
-    print("="*60 + "\n")
-
-    chat_history = ""
-    last_buyer_offer = 0
-    last_seller_offer = scenario['list_price']
-    final_price = 0
-    deal_made = False
-
-    for r in range(config["rounds"] * 2): # Each round has a seller and buyer turn
-        turn_type = "Seller" if r % 2 == 0 else "Buyer"
-        
-        if deal_made: break
-
-        print(f"\n--- Turn {r//2 + 1}: {turn_type}'s Move ---")
-        chat_history = format_chat_history(logger.log_records)
-        
-        if turn_type == "Seller":
-            price, message = seller.act(chat_history)
-            last_seller_offer = price if price is not None else last_seller_offer
-            print(f"Seller says: {message}")
-            print(f"Seller's Price: ${last_seller_offer}")
-            logger.log({"role": "Seller", "message": message, "price": last_seller_offer, "type": "negotiation_turn"})
-        else: # Buyer's turn
-            price, message = buyer.act(chat_history)
-            last_buyer_offer = price if price is not None else last_buyer_offer
-            print(f"Buyer says: {message}")
-            print(f"Buyer's Offer: ${last_buyer_offer}")
-            logger.log({"role": "Buyer", "message": message, "price": last_buyer_offer, "type": "negotiation_turn"})
-
-        # Check for a deal
-        if last_buyer_offer >= last_seller_offer:
-            deal_made = True
-            final_price = last_seller_offer # Deal is made at the seller's asking price
-            print(f"\nDEAL! A deal was struck at ${final_price}")
-            logger.log({"event": "deal_made", "price": final_price})
-            break
-
-    if not deal_made:
-        print("\nNO DEAL! The negotiation ended without an agreement.")
-        logger.log({"event": "no_deal"})
+    with JsonLogger(transcript_path) as logger:
+        logger.log({"event": "negotiation_start", "config": config, "scenario": scenario})
+
+        # Initialize Agents
+        buyer = BuyerAgent(config["buyer_model"], config["temp"], config["seed"], scenario)
+        seller = SellerAgent(config["seller_model"], config["temp"], config["seed"] + 1, scenario)
+        moderator = ModeratorAgent(config["moderator_model"], config["temp"], config["seed"] + 2)
+
+        print("\n" + "="*60)
+        print(f"Starting Negotiation: '{scenario['item_name']}' at a {scenario['name']}")
+        print(f"Listed Price: ${scenario['list_price']}")
+        print("="*60 + "\n")
+
+        chat_history = ""
+        last_buyer_offer = 0
+        last_seller_offer = scenario['list_price']
+        final_price = 0
+        deal_made = False
+        previous_gap = None
+        widening_rounds = 0
+
+        for r in range(config["rounds"] * 2): # Each round has a seller and buyer turn
+            turn_type = "Seller" if r % 2 == 0 else "Buyer"
+
+            if deal_made: break
+
+            print(f"\n--- Turn {r//2 + 1}: {turn_type}'s Move ---")
+            chat_history = format_chat_history(logger.log_records)
+
+            if turn_type == "Seller":
+                price, message = seller.act(chat_history)
+                last_seller_offer = price if price is not None else last_seller_offer
+                print(f"Seller says: {message}")
+                print(f"Seller's Price: ${last_seller_offer}")
+                logger.log({"role": "Seller", "message": message, "price": last_seller_offer, "type": "negotiation_turn"})
+            else: # Buyer's turn
+                price, message = buyer.act(chat_history)
+                last_buyer_offer = price if price is not None else last_buyer_offer
+                print(f"Buyer says: {message}")
+                print(f"Buyer's Offer: ${last_buyer_offer}")
+                logger.log({"role": "Buyer", "message": message, "price": last_buyer_offer, "type": "negotiation_turn"})
+
+            # Check for a deal
+            if last_buyer_offer >= last_seller_offer:
+                deal_made = True
+                final_price = last_seller_offer # Deal is made at the seller's asking price
+                print(f"\nDEAL! A deal was struck at ${final_price}")
+                logger.log({"event": "deal_made", "price": final_price})
+                break
 
-    # Moderator analysis
-    print("\n" + "="*60)
-    print("--- Moderator's Analysis ---")
-    transcript_str = format_chat_history(logger.log_records)
-    analysis = moderator.analyze(transcript_str, final_price, scenario)
-    print(analysis)
-    logger.log({"role": "Moderator", "message": analysis, "type": "analysis"})
+            # After each full round, give up early if the offers keep drifting
+            # apart instead of paying for the remaining LLM turns
+            if turn_type == "Buyer":
+                gap = last_seller_offer - last_buyer_offer
+                widening_rounds = widening_rounds + 1 if previous_gap is not None and gap > previous_gap else 0
+                previous_gap = gap
+                if widening_rounds >= DIVERGENCE_PATIENCE:
+                    print(f"\nThe offers have drifted apart for {widening_rounds} rounds in a row; stopping early.")
+                    logger.log({"event": "negotiation_diverged", "gap": gap})
+                    break
+
+        if not deal_made:
+            print("\nNO DEAL! The negotiation ended without an agreement.")
+            logger.log({"event": "no_deal"})
+
+        # Moderator analysis
+        print("\n" + "="*60)
+        print("--- Moderator's Analysis ---")
+        transcript_str = format_chat_history(logger.log_records)
+        analysis = moderator.analyze(transcript_str, final_price, scenario)
+        print(analysis)
+        logger.log({"role": "Moderator", "message": analysis, "type": "analysis"})
     with open(summary_path, 'w', encoding='utf-8') as f:
         f.write(f"# Negotiation Analysis\n\n**Outcome:** {'Deal at $' + str(final_price) if deal_made else 'No Deal'}\n\n{analysis}")
 
     # Save final metadata
-    duration = time.time() - start_time
+    duration = time.perf_counter() - start_perf
     final_metadata = {"config": config, "scenario": scenario, "outcome": {"deal_made": deal_made, "final_price": final_price}, "timing": {"duration_seconds": round(duration, 2)}}
-    with open(metadata_path, 'w', encoding='utf-8') as f:
-        json.dump(final_metadata, f, indent=4)
+    with open(metadata_path, 'wb') as f:
+        f.write(json_dumps_pretty(final_metadata))
         
     print("\n" + "="*60)
     print(f"Negotiation finished. Results saved in: {results_folder}")
+    return final_metadata
+
+def run_sweep(config: Dict[str, Any], seeds: List[int]) -> Dict[str, Any]:
+    """
+    Run one negotiation per seed in parallel and summarize the outcomes.
+
+    Threads are enough here: nearly all the time is spent waiting on Ollama,
+    which can serve the runs concurrently when OLLAMA_NUM_PARALLEL > 1.
+    At most MAX_SWEEP_WORKERS negotiations run at the same time.
+    """
+    if not seeds:
+        raise ValueError("run_sweep needs at least one seed")
+    # Runs with the same seed would start together and share one results folder
+    if len(set(seeds)) != len(seeds):
+        raise ValueError(f"run_sweep needs distinct seeds, got {list(seeds)}")
+    import numpy as np  # Only sweeps need numpy, so a single run works without it
+
+    configs = [{**config, "seed": seed} for seed in seeds]
+    with ThreadPoolExecutor(max_workers=min(len(configs), MAX_SWEEP_WORKERS)) as pool:
+        results = list(pool.map(run_negotiation, configs))
+
+    deals = np.array([r["outcome"]["deal_made"] for r in results], dtype=bool)
+    final_prices = np.array([r["outcome"]["final_price"] for r in results], dtype=float)[deals]
+    summary = {"seeds": list(seeds), "deal_rate": float(deals.mean())}
+    if final_prices.size:
+        p25, median, p75 = np.percentile(final_prices, [25, 50, 75])
+        summary["final_price"] = {"mean": float(final_prices.mean()), "p25": float(p25), "median": float(median), "p75": float(p75)}
+        # Whoever kept more of the bargaining range got the better deal: the
+        # seller's surplus is above their walk-away price, the buyer's below
+        # their maximum. Ties count for the buyer.
+        scenario = get_scenario(config["scenario_key"])
+        seller_surplus = final_prices - scenario["seller_min_price"]
+        buyer_surplus = scenario["buyer_max_price"] - final_prices
+        buyer_wins = int(np.count_nonzero(buyer_surplus >= seller_surplus))
+        summary["winners"] = {"buyer": buyer_wins, "seller": int(final_prices.size) - buyer_wins}
+
+    print("\n" + "="*60)
+    print(f"Sweep finished: {int(deals.sum())}/{len(seeds)} negotiations reached a deal.")
+    if final_prices.size:
+        stats = summary["final_price"]
+        print(f"Final price: mean ${stats['mean']:.2f} | median ${stats['median']:.2f} | IQR ${stats['p25']:.2f}-${stats['p75']:.2f}")
+        print(f"Better deal: Buyer {summary['winners']['buyer']} | Seller {summary['winners']['seller']}")
+    return summary
+
+def parse_seeds(value: str) -> List[int]:
+    """argparse type for --seeds: a non-empty comma-separated list of distinct integers."""
+    try:
+        seeds = [int(seed) for seed in value.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated integers like 42,43,44, got {value!r}")
+    if len(set(seeds)) != len(seeds):
+        raise argparse.ArgumentTypeError(f"each seed may only appear once, got {value!r}")
+    return seeds
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the multi-agent negotiation simulator.")
+    parser.add_argument("--seeds", type=parse_seeds, help="Comma-separated seeds (e.g. 42,43,44) to run several negotiations in parallel.")
+    args = parser.parse_args()
+
     user_config = get_user_config()
-    run_negotiation(user_config) 
\ No newline at end of file
+    if args.seeds:
+        run_sweep(user_config, args.seeds)
+    else:
+        run_negotiation(user_config) 
\ No newline at end of file
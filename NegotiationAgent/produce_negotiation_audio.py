@@ -3,20 +3,18 @@ Generate an audio recording of a negotiation from its transcript.
 """
 
 import argparse
-import json
 import os
 import sys
 
 try:
-    from gtts import gTTS
+    from orjson import loads as json_loads  # Faster parsing; the stdlib works too
 except ImportError:
-    print("Error: gTTS library not found. Please run 'pip install gTTS'.", file=sys.stderr)
-    sys.exit(1)
+    from json import loads as json_loads
 
 def load_jsonl(file_path: str) -> list:
     """Load records from a JSONL file."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return [json.loads(line) for line in f if line.strip()]
+    with open(file_path, 'rb') as f:
+        return [json_loads(line) for line in f if line.strip()]
 
 def create_negotiation_script(transcript: list) -> str:
     """Create a formatted string script of the negotiation for TTS."""
@@ -69,6 +67,13 @@ def main():
     transcript_data = load_jsonl(transcript_file)
     script_text = create_negotiation_script(transcript_data)
     
+    # Imported only now, so --help and path errors don't pay for loading gTTS
+    try:
+        from gtts import gTTS
+    except ImportError:
+        print("Error: gTTS library not found. Please run 'pip install gTTS'.", file=sys.stderr)
+        sys.exit(1)
+
     print("Generating audio using gTTS... This may take a moment.")
     try:
         tts = gTTS(text=script_text, lang='en', slow=False)
@@ -1,5 +1,11 @@
 """
 Prompt templates for the multi-agent negotiation simulator.
+
+Keep {chat_history} as the last placeholder in the Seller and Buyer prompts.
+Everything above it is fixed for the whole negotiation and the history only
+grows at the end, so each turn's prompt starts with the previous turn's
+prompt. Ollama can then reuse its cached prompt evaluation and only process
+the new lines.
 """
 
 SELLER_PROMPT = """You are a Seller at a {scenario_name}.
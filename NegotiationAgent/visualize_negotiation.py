@@ -3,11 +3,15 @@ Generate an HTML visualization of a negotiation from its transcript.
 """
 
 import argparse
-import json
 import os
 import sys
 import html
 
+try:
+    from orjson import loads as json_loads  # Faster parsing; the stdlib works too
+except ImportError:
+    from json import loads as json_loads
+
 HTML_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="en">
@@ -52,12 +56,12 @@ HTML_TEMPLATE = """
 """
 
 def load_jsonl(file_path: str) -> list:
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return [json.loads(line) for line in f if line.strip()]
+    with open(file_path, 'rb') as f:
+        return [json_loads(line) for line in f if line.strip()]
 
 def load_json(file_path: str) -> dict:
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    with open(file_path, 'rb') as f:
+        return json_loads(f.read())
 
 def load_text(file_path: str) -> str:
     with open(file_path, 'r', encoding='utf-8') as f:
@@ -65,20 +69,21 @@ def load_text(file_path: str) -> str:
 
 def generate_html(transcript: list, metadata: dict, summary_text: str) -> str:
     scenario = metadata.get("scenario", {})
-    chat_html = ""
+    chat_parts = []
     for record in transcript:
         role = record.get("role", "").lower()
         if record.get("type") == "negotiation_turn":
             price = record.get("price")
             price_tag = f"<div class='price-tag'>Offer: ${price}</div>" if price else ""
-            chat_html += f"""
+            chat_parts.append(f"""
             <div class="message {role}">
                 <div class="avatar">{role[0].upper()}</div>
                 <div class="msg-content">
                     <div class="text">{html.escape(record.get("message"))}</div>
                     {price_tag}
                 </div>
-            </div>"""
+            </div>""")
+    chat_html = "".join(chat_parts)
     
     outcome = metadata.get("outcome", {})
     outcome_class = "deal" if outcome.get("deal_made") else "no-deal"
@@ -0,0 +1,7 @@
+"""
+Helpers shared by the agent projects (DebateAgent, NegotiationAgent).
+
+The projects are run as scripts from their own folders, so their
+ollama_utils modules add the repository root to sys.path before importing
+from here.
+"""
@@ -0,0 +1,116 @@
+"""
+Exact-match cache for LLM responses.
+
+Responses are keyed on the model, the prompt and every sampling option, so
+re-running a simulation with the same seed returns the stored answers instead
+of calling Ollama again. Hits are served from memory first, then from a small
+SQLite file next to this module so they survive between runs.
+
+By default only deterministic queries (temperature 0) are cached: a sampled
+answer is one draw among many, and replaying it would hide the variation a
+re-run is meant to show. Set OLLAMA_RESPONSE_CACHE=1 to cache every query,
+or OLLAMA_RESPONSE_CACHE=0 to disable the cache entirely.
+"""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".response_cache.sqlite")
+
+# None: cache only temperature-0 queries; True/False: cache always/never
+_env_setting = os.environ.get("OLLAMA_RESPONSE_CACHE")
+_enabled = None if _env_setting is None else _env_setting != "0"
+_memory = {}
+_lock = threading.Lock()
+_connection = None
+
+
+def set_enabled(enabled: bool) -> None:
+    """Turn the cache on (for every temperature) or off for the rest of the process."""
+    global _enabled
+    _enabled = enabled
+
+
+def should_cache(temperature: float) -> bool:
+    """Whether a query at this temperature goes through the cache."""
+    if _enabled is None:
+        return temperature == 0
+    return _enabled
+
+
+def make_key(*args, **kwargs) -> str:
+    """Hash the query arguments into a stable cache key."""
+    payload = json.dumps([args, sorted(kwargs.items())], default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _db() -> sqlite3.Connection:
+    global _connection
+    if _connection is None:
+        _connection = sqlite3.connect(CACHE_PATH, check_same_thread=False)
+        _connection.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT)")
+    return _connection
+
+
+def get(key: str):
+    """Return the cached response for key, or None."""
+    with _lock:
+        if key in _memory:
+            return _memory[key]
+        row = _db().execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            _memory[key] = row[0]
+            return row[0]
+    return None
+
+
+def put(key: str, response: str) -> None:
+    """Store a response under key."""
+    with _lock:
+        _memory[key] = response
+        _db().execute("INSERT OR REPLACE INTO responses (key, response) VALUES (?, ?)", (key, response))
+        _db().commit()
+
+
+def cached(func):
+    """
+    Decorate a (sync or async) query function with the response cache.
+
+    The function must take a temperature argument, which decides whether a
+    call is cached (see should_cache).
+    """
+    signature = inspect.signature(func)
+
+    def temperature_of(args, kwargs) -> float:
+        return signature.bind(*args, **kwargs).arguments["temperature"]
+
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if not should_cache(temperature_of(args, kwargs)):
+                return await func(*args, **kwargs)
+            key = make_key(*args, **kwargs)
+            response = get(key)
+            if response is None:
+                response = await func(*args, **kwargs)
+                put(key, response)
+            return response
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not should_cache(temperature_of(args, kwargs)):
+            return func(*args, **kwargs)
+        key = make_key(*args, **kwargs)
+        response = get(key)
+        if response is None:
+            response = func(*args, **kwargs)
+            put(key, response)
+        return response
+    return wrapper